@@ -4,29 +4,194 @@ Compatible with Windows and Linux only
 """
 
 import argparse
+import copy
+import functools
+import hashlib
 import os
+import re
 import sys
 import platform
 import importlib.util
 import subprocess
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+from micropp_rt import fast_copy
+
+# orjson is much faster than the json module, use it when it's installed
+try:
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, indent=2, sort_keys=True).encode()
+
+
+# Parsed config files, keyed by path: (st_mtime_ns, st_size, config)
+_CONFIG_CACHE = {}
+
+# Compiled objects kept in the object cache, least recently used ones are removed first
+_OBJECT_CACHE_MAX_ENTRIES = 256
+
+
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the command line parser, which is the same for every run"""
+    parser = argparse.ArgumentParser(
+        description="Micro++ - Compile and deploy C++ to microcontrollers (Windows/Linux only)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  List available boards:
+    python micro++.py list-boards
+
+  Add a new board:
+    python micro++.py add-board my_board.json
+
+  Compile and deploy to a board:
+    python micro++.py compile --source C:\\PROJECTS\\MicroCC\\blink.cpp -b RP2040 -a E:
+
+  Compile and deploy with verbose output:
+    python micro++.py compile --source C:\\PROJECTS\\MicroCC\\blink.cpp -b ESP32 -a /dev/ttyUSB0 -v
+        """
+    )
+
+    # Create subparsers for different command modes
+    subparsers = parser.add_subparsers(dest='command', help='Command to execute')
+
+    # Board management commands
+    list_parser = subparsers.add_parser('list-boards', help='List available boards')
+    list_parser.add_argument('-v', '--verbose', action='store_true',
+                             help='Show board details and supported libraries')
+
+    add_parser = subparsers.add_parser('add-board', help='Add a new board from JSON file')
+    add_parser.add_argument('json_file', help='JSON file containing board specification')
+
+    # Configuration commands
+    config_parser = subparsers.add_parser('config', help='Configure toolchains and SDKs')
+    config_parser.add_argument('--show', action='store_true', help='Show current configuration')
+    config_parser.add_argument('--toolchain', choices=['arm-gcc', 'xtensa-gcc'],
+                              help='Configure a specific toolchain')
+    config_parser.add_argument('--sdk', choices=['pico-sdk'],
+                              help='Configure a specific SDK')
+    config_parser.add_argument('--path', help='Path to the toolchain or SDK')
+
+    # Compile and deploy command
+    compile_parser = subparsers.add_parser('compile', help='Compile and deploy code')
+    compile_parser.add_argument('--source', type=str, required=True, help='Source file to compile')
+    compile_parser.add_argument('-b', '--board', required=True, help='Target board')
+    compile_parser.add_argument('-a', '--address', required=True,
+                              help='Address (e.g., COM6, /dev/ttyUSB0)')
+    compile_parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
+    compile_parser.add_argument('--compile-only', action='store_true',
+                              help='Compile only, do not deploy')
+
+    return parser
+
+
+class BoardSpec:
+    """A board added with add-board, described by its entry in the board registry
+
+    Exposes the same functions as a board module. Boards that need real firmware
+    generation or deployment can provide them in plugins/<board>.py, which can
+    use micropp_rt.fast_copy to stage firmware images without rewriting them.
+    """
+
+    def __init__(self, spec: dict, plugin=None):
+        self.spec = spec
+        self.plugin = plugin
+
+    def get_spec(self):
+        return self.spec
+
+    def get_libraries(self):
+        return self.spec["libraries"]
+
+    def get_firmware_format(self):
+        return self.spec["firmware_format"]
+
+    def get_toolchain(self):
+        return self.spec["toolchain"]
+
+    def get_sdk(self):
+        return self.spec.get("sdk")
+
+    def get_compile_flags(self):
+        return list(self.spec["compile_flags"])
+
+    def generate_firmware(self, compiled_file):
+        if self.plugin and hasattr(self.plugin, 'generate_firmware'):
+            return self.plugin.generate_firmware(compiled_file)
+
+        # Placeholder until the board has a plugin with real firmware generation
+        print(f"Generating {self.get_firmware_format()} firmware for {compiled_file}")
+        output_file = compiled_file.with_suffix(f".{self.get_firmware_format()}")
+
+        # For demonstration purposes, just create an empty file
+        with open(output_file, 'w') as f:
+            f.write("# Placeholder firmware file\n")
+
+        return output_file
+
+    def deploy_firmware(self, firmware_file, address):
+        if self.plugin and hasattr(self.plugin, 'deploy_firmware'):
+            return self.plugin.deploy_firmware(firmware_file, address)
+
+        # Placeholder until the board has a plugin with real deployment
+        print(f"Deploying {firmware_file} to {address}")
+        return True
+
 
 class MicroPP:
+    # Pico SDK include directories, relative to the SDK root
+    _PICO_SUBPATHS = (
+        "src/common/pico_stdlib_headers/include",
+        "src/rp2_common/hardware_gpio/include",
+        "src/rp2_common/pico_platform/include",
+        "src/rp2040/hardware_regs/include",
+        "src/common/pico_base_headers/include",
+        "src/boards/include",
+        "src/rp2_common/hardware_base/include",
+        "src/rp2_common/hardware_sync/include",
+        "src/rp2_common/hardware_irq/include",
+        "src/rp2_common/hardware_timer/include",
+        "build/generated/pico_base",  # Include generated files
+    )
+
     def __init__(self):
         self.base_dir = Path(__file__).parent.absolute()
         self.boards_dir = self.base_dir / "boards"
+        self.board_registry_file = self.boards_dir / "registry.json"
+        self.plugins_dir = self.base_dir / "plugins"
         self.config_file = self.base_dir / "config.json"
         self.tools_dir = self.base_dir / "tools"
         self.sdks_dir = self.base_dir / "sdks"
+        self.cache_dir = self.base_dir / ".micropp_cache"
+
+        # Specs of boards added with add-board, loaded on first use
+        self._board_registry = None
+        self._board_registry_invalid = False
+
+        # Loaded board modules, keyed by name: (st_mtime_ns, module)
+        self._board_cache = {}
 
         # Check for supported OS
         self.system = platform.system().lower()
         if self.system not in ['windows', 'linux']:
             self.exit_unsupported_os()
+        self._system_key = "windows" if self.system == "windows" else "linux"
+
+        # Pico SDK include flags, keyed by SDK path
+        self._pico_include_cache = {}
 
         # Setup logging
         logging.basicConfig(
@@ -51,7 +216,9 @@ class MicroPP:
 
     def load_config(self):
         """Load configuration from config file or create default if not exists"""
-        if not self.config_file.exists():
+        try:
+            st = os.stat(self.config_file)
+        except FileNotFoundError:
             self.logger.info("Creating default configuration")
             self.config = {
                 "toolchains": {
@@ -66,77 +233,44 @@ class MicroPP:
                 },
                 "sdks": {}
             }
-            with open(self.config_file, 'w') as f:
-                json.dump(self.config, f, indent=2)
-        else:
-            try:
-                with open(self.config_file, 'r') as f:
-                    self.config = json.load(f)
-                # Validate minimum config structure
-                if "toolchains" not in self.config:
-                    self.config["toolchains"] = {}
-                if "sdks" not in self.config:
-                    self.config["sdks"] = {}
-            except json.JSONDecodeError:
-                self.logger.error(f"Invalid JSON in config file: {self.config_file}")
-                self.logger.info("Creating new configuration")
-                self.config = {"toolchains": {}, "sdks": {}}
+            self.save_config()
+            return
 
-    def save_config(self):
-        """Save configuration to config file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
+        # Reuse the parsed config if the file is unchanged since it was last read
+        cached = _CONFIG_CACHE.get(self.config_file)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            self.config = copy.deepcopy(cached[2])
+            return
 
-    def parse_args(self) -> argparse.Namespace:
-        """Parse command line arguments"""
-        parser = argparse.ArgumentParser(
-            description="Micro++ - Compile and deploy C++ to microcontrollers (Windows/Linux only)",
-            formatter_class=argparse.RawDescriptionHelpFormatter,
-            epilog="""
-Examples:
-  List available boards:
-    python micro++.py list-boards
-
-  Add a new board:
-    python micro++.py add-board my_board.json
-
-  Compile and deploy to a board:
-    python micro++.py compile --source C:\\PROJECTS\\MicroCC\\blink.cpp -b RP2040 -a E:
-
-  Compile and deploy with verbose output:
-    python micro++.py compile --source C:\\PROJECTS\\MicroCC\\blink.cpp -b ESP32 -a /dev/ttyUSB0 -v
-            """
-        )
-
-        # Create subparsers for different command modes
-        subparsers = parser.add_subparsers(dest='command', help='Command to execute')
-
-        # Board management commands
-        subparsers.add_parser('list-boards', help='List available boards')
-
-        add_parser = subparsers.add_parser('add-board', help='Add a new board from JSON file')
-        add_parser.add_argument('json_file', help='JSON file containing board specification')
+        try:
+            self.config = _loads(self.config_file.read_bytes())
+            # Validate minimum config structure
+            if "toolchains" not in self.config:
+                self.config["toolchains"] = {}
+            if "sdks" not in self.config:
+                self.config["sdks"] = {}
+            _CONFIG_CACHE[self.config_file] = (st.st_mtime_ns, st.st_size, copy.deepcopy(self.config))
+        except json.JSONDecodeError:
+            self.logger.error(f"Invalid JSON in config file: {self.config_file}")
+            self.logger.info("Creating new configuration")
+            self.config = {"toolchains": {}, "sdks": {}}
 
-        # Configuration commands
-        config_parser = subparsers.add_parser('config', help='Configure toolchains and SDKs')
-        config_parser.add_argument('--show', action='store_true', help='Show current configuration')
-        config_parser.add_argument('--toolchain', choices=['arm-gcc', 'xtensa-gcc'],
-                                  help='Configure a specific toolchain')
-        config_parser.add_argument('--sdk', choices=['pico-sdk'],
-                                  help='Configure a specific SDK')
-        config_parser.add_argument('--path', help='Path to the toolchain or SDK')
+    def save_config(self):
+        """Save configuration to config file, skipping the write if nothing changed"""
+        data = _dumps(self.config)
+        try:
+            if self.config_file.read_bytes() == data:
+                return
+        except FileNotFoundError:
+            pass
 
-        # Compile and deploy command
-        compile_parser = subparsers.add_parser('compile', help='Compile and deploy code')
-        compile_parser.add_argument('--source', type=str, required=True, help='Source file to compile')
-        compile_parser.add_argument('-b', '--board', required=True, help='Target board')
-        compile_parser.add_argument('-a', '--address', required=True,
-                                  help='Address (e.g., COM6, /dev/ttyUSB0)')
-        compile_parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
-        compile_parser.add_argument('--compile-only', action='store_true',
-                                  help='Compile only, do not deploy')
+        self.config_file.write_bytes(data)
+        st = os.stat(self.config_file)
+        _CONFIG_CACHE[self.config_file] = (st.st_mtime_ns, st.st_size, copy.deepcopy(self.config))
 
-        return parser.parse_args()
+    def parse_args(self) -> argparse.Namespace:
+        """Parse command line arguments"""
+        return _build_parser().parse_args()
 
     def show_config(self):
         """Display current configuration"""
@@ -146,7 +280,7 @@ Examples:
 
     def configure_toolchain(self, toolchain_name, path):
         """Configure a toolchain with a custom path"""
-        system = "windows" if platform.system().lower() == "windows" else "linux"
+        system = self._system_key
         
         if "toolchains" not in self.config:
             self.config["toolchains"] = {}
@@ -161,7 +295,7 @@ Examples:
 
     def configure_sdk(self, sdk_name, path):
         """Configure an SDK with a custom path"""
-        system = "windows" if platform.system().lower() == "windows" else "linux"
+        system = self._system_key
         
         if "sdks" not in self.config:
             self.config["sdks"] = {}
@@ -174,25 +308,38 @@ Examples:
         self.logger.info(f"Configured {sdk_name} for {system}: {path}")
         return True
 
-    def list_available_boards(self):
+    def list_available_boards(self, verbose: bool = False):
         """List all available boards"""
         if not self.boards_dir.exists():
             self.logger.info("No boards directory found. Creating one...")
             self.boards_dir.mkdir(exist_ok=True)
             return False
 
-        boards = [f.stem for f in self.boards_dir.glob("*.py") if f.is_file() and f.stem != "__init__"]
+        registry = self.get_board_registry()
+        with os.scandir(self.boards_dir) as entries:
+            module_boards = [entry.name[:-3] for entry in entries
+                             if entry.name.endswith(".py") and entry.name != "__init__.py"
+                             and entry.is_file()]
+        boards = list(registry) + [board for board in module_boards if board not in registry]
 
         if not boards:
             self.logger.info("No boards found. Use 'add-board' to add a new board.")
             return False
 
+        # Getting the specs may mean importing board modules, so only do it when asked
+        if not verbose:
+            print("Available boards:")
+            for board in boards:
+                print(f"  - {board}")
+            return True
+
+        # Board modules are independent of each other, so import them in parallel
+        with ThreadPoolExecutor(max_workers=min(8, len(boards))) as executor:
+            specs = list(executor.map(self.get_board_summary_spec, boards))
+
         print("Available boards:")
-        for board in boards:
-            # Try to load the board module to get more info
-            board_module = self.load_board_module(board)
-            if board_module and hasattr(board_module, 'get_spec'):
-                spec = board_module.get_spec()
+        for board, spec in zip(boards, specs):
+            if spec:
                 print(f"  - {board}: {spec.get('name', board)}")
                 if 'libraries' in spec:
                     print(f"    Supported libraries: {', '.join(lib.split('/')[-1] for lib in spec['libraries'][:3])}...")
@@ -201,6 +348,30 @@ Examples:
 
         return True
 
+    def get_board_registry(self) -> dict:
+        """Load the specs of boards added with add-board"""
+        if self._board_registry is None:
+            try:
+                self._board_registry = _loads(self.board_registry_file.read_bytes())
+            except FileNotFoundError:
+                self._board_registry = {}
+            except json.JSONDecodeError:
+                self.logger.error(f"Invalid JSON in board registry: {self.board_registry_file}")
+                self._board_registry = {}
+                self._board_registry_invalid = True
+        return self._board_registry
+
+    def get_board_summary_spec(self, board_name: str) -> Optional[dict]:
+        """Get a board's spec for listing, only importing board modules not in the registry"""
+        registry = self.get_board_registry()
+        if board_name in registry:
+            return registry[board_name]
+
+        board_module = self.load_board_module(board_name)
+        if board_module and hasattr(board_module, 'get_spec'):
+            return board_module.get_spec()
+        return None
+
     def add_new_board(self, json_file: str):
         """Add a new board from a JSON specification file"""
         try:
@@ -209,8 +380,7 @@ Examples:
                 self.logger.error(f"JSON file not found: {json_file}")
                 return False
 
-            with open(json_path, 'r') as f:
-                board_spec = json.load(f)
+            board_spec = _loads(json_path.read_bytes())
 
             # Basic validation
             required_keys = ["name", "toolchain", "firmware_format", "compile_flags", "libraries"]
@@ -219,53 +389,22 @@ Examples:
                 self.logger.error(f"Missing required keys in board specification: {', '.join(missing_keys)}")
                 return False
 
-            # Create board module
-            board_name = board_spec["name"]
-            board_file = self.boards_dir / f"{board_name}.py"
-
             # Ensure boards directory exists
             self.boards_dir.mkdir(exist_ok=True)
 
-            with open(board_file, 'w') as f:
-                f.write(f'''\"\"\"
-Board specification for {board_name}
-\"\"\"
-
-def get_spec():
-    return {board_spec}
-
-def get_libraries():
-    return {board_spec['libraries']}
-
-def get_firmware_format():
-    return "{board_spec['firmware_format']}"
-
-def get_toolchain():
-    return "{board_spec['toolchain']}"
-
-def get_compile_flags():
-    return {board_spec['compile_flags']}
-
-def generate_firmware(compiled_file):
-    # Board-specific firmware generation logic
-    # This is a placeholder that should be customized
-    print(f"Generating {get_firmware_format()} firmware for {{compiled_file}}")
-    output_file = compiled_file.with_suffix(f".{{get_firmware_format()}}")
-
-    # For demonstration purposes, just create an empty file
-    with open(output_file, 'w') as f:
-        f.write("# Placeholder firmware file\\n")
+            # Register the board, never overwriting a registry that couldn't be read
+            board_name = board_spec["name"]
+            registry = self.get_board_registry()
+            if self._board_registry_invalid:
+                self.logger.error(f"Not adding {board_name}: fix or remove {self.board_registry_file} first")
+                return False
+            registry[board_name] = board_spec
 
-    return output_file
+            # Replace the registry only once the new one is fully written
+            temp_file = self.board_registry_file.with_suffix(".json.tmp")
+            temp_file.write_bytes(_dumps(registry))
+            os.replace(temp_file, self.board_registry_file)
 
-def deploy_firmware(firmware_file, address):
-    # Board-specific deployment logic
-    # This is a placeholder that should be customized
-    print(f"Deploying {{firmware_file}} to {{address}}")
-    # Example deployment command
-    # subprocess.run(["tool", "flash", "-p", address, firmware_file])
-    return True
-''')
             self.logger.info(f"Added new board: {board_name}")
             return True
         except json.JSONDecodeError:
@@ -275,17 +414,44 @@ def deploy_firmware(firmware_file, address):
             self.logger.error(f"Error adding board: {str(e)}")
             return False
 
+    def load_board(self, board_name: str):
+        """Load a board by name, from the registry or from its board module"""
+        registry = self.get_board_registry()
+        if board_name not in registry:
+            return self.load_board_module(board_name)
+
+        # Plugins are only imported for the board being compiled, never for listing
+        plugin = None
+        plugin_file = self.plugins_dir / f"{board_name}.py"
+        if plugin_file.exists():
+            try:
+                spec = importlib.util.spec_from_file_location(f"{board_name}_plugin", plugin_file)
+                plugin = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(plugin)
+            except Exception as e:
+                self.logger.error(f"Error loading board plugin: {str(e)}")
+                return None
+
+        return BoardSpec(registry[board_name], plugin)
+
     def load_board_module(self, board_name: str):
         """Load a board module by name"""
         board_file = self.boards_dir / f"{board_name}.py"
-        if not board_file.exists():
+        try:
+            mtime_ns = board_file.stat().st_mtime_ns
+        except FileNotFoundError:
             self.logger.error(f"Board '{board_name}' not found")
             return None
 
+        cached = self._board_cache.get(board_name)
+        if cached and cached[0] == mtime_ns:
+            return cached[1]
+
         try:
             spec = importlib.util.spec_from_file_location(board_name, board_file)
             module = importlib.util.module_from_spec(spec)
             spec.loader.exec_module(module)
+            self._board_cache[board_name] = (mtime_ns, module)
             return module
         except Exception as e:
             self.logger.error(f"Error loading board module: {str(e)}")
@@ -293,7 +459,7 @@ def deploy_firmware(firmware_file, address):
 
     def get_toolchain_path(self, toolchain_name: str) -> Optional[str]:
         """Get the toolchain path for the current OS"""
-        system = "windows" if platform.system().lower() == "windows" else "linux"
+        system = self._system_key
 
         if toolchain_name not in self.config.get("toolchains", {}):
             self.logger.error(f"Toolchain '{toolchain_name}' not found in config")
@@ -313,6 +479,87 @@ def deploy_firmware(firmware_file, address):
 
         return toolchain_path
 
+    def _pico_sdk_includes(self, sdk_path: Path) -> tuple:
+        """Get the include flags for a Pico SDK checkout"""
+        includes = self._pico_include_cache.get(sdk_path)
+        if includes is None:
+            includes = tuple(f"-I{sdk_path}/{subpath}" for subpath in self._PICO_SUBPATHS)
+            self._pico_include_cache[sdk_path] = includes
+        return includes
+
+    def get_compile_cache_key(self, source_path: Path, toolchain_path: str, compile_flags) -> str:
+        """Hash everything that determines the object file except included headers"""
+        toolchain_stat = os.stat(toolchain_path)
+        key = hashlib.blake2b(digest_size=16)
+        key.update(source_path.read_bytes())
+        key.update(str(source_path.absolute()).encode())
+        key.update("\0".join(compile_flags).encode())
+        # Relative paths in the flags, like -I include, resolve against the working directory
+        key.update(os.getcwd().encode())
+        key.update(f"{toolchain_path}\0{toolchain_stat.st_mtime_ns}\0{toolchain_stat.st_size}".encode())
+        return key.hexdigest()
+
+    def restore_cached_object(self, cache_key: str, output_path: Path) -> bool:
+        """Copy a cached object file to output_path if none of its headers changed"""
+        try:
+            deps_path = self.cache_dir / f"{cache_key}.deps.json"
+            with open(deps_path, 'r') as f:
+                deps = json.load(f)
+            for dep_path, mtime_ns, size in deps:
+                st = os.stat(dep_path)
+                if (st.st_mtime_ns, st.st_size) != (mtime_ns, size):
+                    return False
+            fast_copy(self.cache_dir / f"{cache_key}.o", output_path)
+            # Mark the entry as recently used, so pruning keeps it
+            os.utime(deps_path)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def store_cached_object(self, cache_key: str, output_path: Path, dep_file: Path):
+        """Store a freshly compiled object file along with the headers it was built from"""
+        try:
+            # The depfile target is fixed with -MT, so everything after it is a dependency
+            dep_text = dep_file.read_text().replace("\\\n", " ")
+            dep_text = dep_text.split(":", 1)[1]
+            deps = []
+            for dep_path in re.findall(r"(?:\\ |\S)+", dep_text):
+                dep_path = str(Path(dep_path.replace("\\ ", " ")).absolute())
+                st = os.stat(dep_path)
+                deps.append([dep_path, st.st_mtime_ns, st.st_size])
+
+            # Write the object before its deps file, which is what marks the entry as complete
+            tmp_suffix = f".{os.getpid()}.tmp"
+            obj_tmp = self.cache_dir / f"{cache_key}.o{tmp_suffix}"
+            fast_copy(output_path, obj_tmp)
+            os.replace(obj_tmp, self.cache_dir / f"{cache_key}.o")
+
+            deps_tmp = self.cache_dir / f"{cache_key}.deps.json{tmp_suffix}"
+            with open(deps_tmp, 'w') as f:
+                json.dump(deps, f)
+            os.replace(deps_tmp, self.cache_dir / f"{cache_key}.deps.json")
+            self.prune_object_cache()
+        except (OSError, IndexError) as e:
+            self.logger.debug(f"Could not cache compiled object: {str(e)}")
+        finally:
+            dep_file.unlink(missing_ok=True)
+
+    def prune_object_cache(self):
+        """Remove the least recently used object cache entries beyond _OBJECT_CACHE_MAX_ENTRIES"""
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".deps.json"):
+                    entries.append((entry.stat().st_mtime_ns, entry.name[:-len(".deps.json")]))
+        if len(entries) <= _OBJECT_CACHE_MAX_ENTRIES:
+            return
+
+        entries.sort()
+        for _, cache_key in entries[:len(entries) - _OBJECT_CACHE_MAX_ENTRIES]:
+            # Remove the deps file first, since it is what marks an entry as complete
+            (self.cache_dir / f"{cache_key}.deps.json").unlink(missing_ok=True)
+            (self.cache_dir / f"{cache_key}.o").unlink(missing_ok=True)
+
     def compile(self, source_file: str, board_module, verbose: bool = False) -> Optional[Path]:
         """Compile the source file for the target board"""
         toolchain_name = board_module.get_toolchain()
@@ -329,32 +576,19 @@ def deploy_firmware(firmware_file, address):
         output_path = source_path.with_suffix(".o")
 
         # Get board-specific compile flags
-        compile_flags = board_module.get_compile_flags()
+        compile_flags = list(board_module.get_compile_flags())
 
         # Add SDK include paths if the board specifies an SDK
         if hasattr(board_module, 'get_sdk') and callable(getattr(board_module, 'get_sdk')):
             sdk_name = board_module.get_sdk()
             if sdk_name:
-                system = "windows" if platform.system().lower() == "windows" else "linux"
+                system = self._system_key
                 if sdk_name in self.config.get("sdks", {}) and system in self.config["sdks"][sdk_name]:
                     sdk_path = Path(self.config["sdks"][sdk_name][system])
                     if sdk_path.exists():
                         if sdk_name == "pico-sdk":
                             # Add Pico SDK include paths
-                            sdk_include_paths = [
-                                f"-I{sdk_path}/src/common/pico_stdlib_headers/include",
-                                f"-I{sdk_path}/src/rp2_common/hardware_gpio/include",
-                                f"-I{sdk_path}/src/rp2_common/pico_platform/include",
-                                f"-I{sdk_path}/src/rp2040/hardware_regs/include",
-                                f"-I{sdk_path}/src/common/pico_base_headers/include",
-                                f"-I{sdk_path}/src/boards/include",
-                                f"-I{sdk_path}/src/rp2_common/hardware_base/include",
-                                f"-I{sdk_path}/src/rp2_common/hardware_sync/include",
-                                f"-I{sdk_path}/src/rp2_common/hardware_irq/include",
-                                f"-I{sdk_path}/src/rp2_common/hardware_timer/include",
-                                f"-I{sdk_path}/build/generated/pico_base"  # Include generated files
-                            ]
-                            compile_flags.extend(sdk_include_paths)
+                            compile_flags.extend(self._pico_sdk_includes(sdk_path))
                         if verbose:
                             self.logger.info(f"Using {sdk_name} at: {sdk_path}")
                     else:
@@ -366,23 +600,48 @@ def deploy_firmware(firmware_file, address):
         cmd = [toolchain_path, "-c", str(source_path), "-o", str(output_path)]
         cmd.extend(compile_flags)
 
+        # The object cache is best-effort, so a cache directory that can't be used only disables it
+        dep_file = None
+        try:
+            # Skip the toolchain entirely if this exact compilation has been done before. Not in
+            # verbose mode, where the compiler's warnings are wanted.
+            cache_key = self.get_compile_cache_key(source_path, toolchain_path, compile_flags)
+            if not verbose and self.restore_cached_object(cache_key, output_path):
+                self.logger.info("Compilation successful (cached)")
+                return output_path
+
+            # Have the compiler list the headers it reads so the cache entry can be validated later
+            self.cache_dir.mkdir(exist_ok=True)
+            if os.access(self.cache_dir, os.W_OK):
+                dep_file = self.cache_dir / f"{cache_key}.{os.getpid()}.d"
+                cmd.extend(["-MD", "-MF", str(dep_file), "-MT", "micropp"])
+        except OSError as e:
+            self.logger.debug(f"Object cache unavailable: {str(e)}")
+
         # Execute compilation
         try:
             if verbose:
                 self.logger.info(f"Executing: {' '.join(cmd)}")
 
+            # In verbose mode compiler output goes straight to the terminal, otherwise
+            # only stderr is kept and it's only decoded if compilation fails
             result = subprocess.run(
                 cmd,
                 check=False,  # Don't raise exception, handle manually
-                capture_output=True,
-                text=True
+                stdout=None if verbose else subprocess.DEVNULL,
+                stderr=None if verbose else subprocess.PIPE
             )
 
             if result.returncode != 0:
                 self.logger.error("Compilation failed")
-                self.logger.error(result.stderr)
+                if result.stderr:
+                    self.logger.error(result.stderr.decode('utf-8', errors='replace'))
+                if dep_file:
+                    dep_file.unlink(missing_ok=True)
                 return None
 
+            if dep_file:
+                self.store_cached_object(cache_key, output_path, dep_file)
             self.logger.info("Compilation successful")
             return output_path
         except Exception as e:
@@ -391,8 +650,8 @@ def deploy_firmware(firmware_file, address):
 
     def build_and_deploy(self, args):
         """Main workflow to build and deploy code"""
-        # Load board module
-        board_module = self.load_board_module(args.board)
+        # Load board
+        board_module = self.load_board(args.board)
         if not board_module:
             self.logger.error(f"Board '{args.board}' not supported")
             self.logger.info("Use 'list-boards' to see available boards")
@@ -448,7 +707,7 @@ def deploy_firmware(firmware_file, address):
 
         # Handle commands
         if args.command == 'list-boards':
-            return 0 if self.list_available_boards() else 1
+            return 0 if self.list_available_boards(args.verbose) else 1
 
         elif args.command == 'add-board':
             return 0 if self.add_new_board(args.json_file) else 1
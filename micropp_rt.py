@@ -0,0 +1,57 @@
+"""
+Micro++ runtime helpers
+Importable from board modules and board plugins as `micropp_rt`
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+# FICLONE ioctl request number, from linux/fs.h
+_FICLONE = 0x40049409
+
+
+def fast_copy(src, dst) -> Path:
+    """Copy a file, sharing its blocks instead of copying them where possible
+
+    On Linux, a copy within one reflink-capable filesystem (BTRFS, XFS with reflink,
+    OpenZFS 2.2+) is a copy-on-write clone that only writes metadata. Other Linux
+    copies are done in the kernel with copy_file_range, and everything else falls
+    back to shutil.copyfile.
+    """
+    src = Path(src)
+    dst = Path(dst)
+
+    # Opening dst for writing truncates it, which would destroy src if they're the same file
+    try:
+        same_file = os.path.samefile(src, dst)
+    except FileNotFoundError:
+        same_file = False
+    if same_file:
+        raise shutil.SameFileError(f"{str(src)!r} and {str(dst)!r} are the same file")
+
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            try:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+                return dst
+            except OSError:
+                pass
+
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                if remaining == 0:
+                    return dst
+            except OSError:
+                pass
+
+    shutil.copyfile(src, dst)
+    return dst
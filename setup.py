@@ -8,238 +8,53 @@ import os
 import sys
 import platform
 import subprocess
+import hashlib
 import json
+import mmap
 import shutil
 import tempfile
+import time
 import zipfile
 import tarfile
+import threading
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
+# urllib3 keeps connections alive across redirects and downloads, use it when it's installed
+try:
+    import urllib3
+except ImportError:
+    urllib3 = None
 
-class MicroPPSetup:
-    def __init__(self):
-        self.base_dir = Path(__file__).parent.absolute()
-        self.config_file = self.base_dir / "config.json"
-        self.boards_dir = self.base_dir / "boards"
-        self.tools_dir = self.base_dir / "tools"
-        self.sdks_dir = self.base_dir / "sdks"
-        
-        # URLs for toolchain and SDK downloads - removed macOS URLs
-        self.download_urls = {
-            "arm-gcc": {
-                "windows": "https://developer.arm.com/-/media/Files/downloads/gnu-rm/10.3-2021.10/gcc-arm-none-eabi-10.3-2021.10-win32.zip",
-                "linux": "https://developer.arm.com/-/media/Files/downloads/gnu-rm/10.3-2021.10/gcc-arm-none-eabi-10.3-2021.10-x86_64-linux.tar.bz2"
-            },
-            "xtensa-gcc": {
-                "windows": "https://github.com/espressif/crosstool-NG/releases/download/esp-2021r2-patch5/xtensa-esp32-elf-gcc8_4_0-esp-2021r2-patch5-win32.zip",
-                "linux": "https://github.com/espressif/crosstool-NG/releases/download/esp-2021r2-patch5/xtensa-esp32-elf-gcc8_4_0-esp-2021r2-patch5-linux-amd64.tar.gz"
-            },
-            "pico-sdk": {
-                "git": "https://github.com/raspberrypi/pico-sdk.git"
-            }
-        }
-        
-        # Create necessary directories
-        self.tools_dir.mkdir(exist_ok=True)
-        self.sdks_dir.mkdir(exist_ok=True)
-        self.boards_dir.mkdir(exist_ok=True)
-        
-        # Initialize config
-        self.config = self.load_config()
-
-    def load_config(self):
-        """Load or create the configuration file"""
-        if self.config_file.exists():
-            with open(self.config_file, 'r') as f:
-                return json.load(f)
-        else:
-            # Default config
-            return {
-                "toolchains": {},
-                "sdks": {}
-            }
-
-    def save_config(self):
-        """Save configuration to file"""
-        with open(self.config_file, 'w') as f:
-            json.dump(self.config, f, indent=2)
-
-    def get_system(self):
-        """Get the current operating system"""
-        system = platform.system().lower()
-        if system == "darwin":
-            print("macOS is not supported. Apple users are not welcome here.")
-            sys.exit(1)
-        elif system == "windows":
-            return "windows"
-        else:
-            return "linux"  # Default to Linux for others
-
-    def download_file(self, url, dest_path):
-        """Download a file with progress indicator"""
-        print(f"Downloading from {url}...")
-        
-        # Create temporary file for download
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_path = temp_file.name
-        
-        try:
-            # Download with progress reporting
-            def report_progress(block_num, block_size, total_size):
-                if total_size > 0:
-                    percent = min(int(block_num * block_size * 100 / total_size), 100)
-                    sys.stdout.write(f"\r[{'#' * (percent // 5)}{'.' * (20 - percent // 5)}] {percent}%")
-                    sys.stdout.flush()
-            
-            urllib.request.urlretrieve(url, temp_path, reporthook=report_progress)
-            print()  # New line after progress bar
-            
-            # Move to final destination
-            shutil.move(temp_path, dest_path)
-            return True
-        except Exception as e:
-            print(f"Error downloading: {e}")
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-            return False
+# Extracted toolchains are cached as zstd-compressed tarballs when zstandard is installed
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
-    def extract_archive(self, archive_path, extract_dir):
-        """Extract a zip or tar archive"""
-        print(f"Extracting {archive_path}...")
-        
-        try:
-            if str(archive_path).endswith('.zip'):
-                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_dir)
-            elif str(archive_path).endswith('.tar.gz') or str(archive_path).endswith('.tar.bz2'):
-                with tarfile.open(archive_path) as tar_ref:
-                    tar_ref.extractall(extract_dir)
-            else:
-                print(f"Unsupported archive format: {archive_path}")
-                return False
-                
-            return True
-        except Exception as e:
-            print(f"Error extracting archive: {e}")
-            return False
-
-    def find_executable(self, base_dir, name_pattern):
-        """Find an executable in a directory tree"""
-        for root, _, files in os.walk(base_dir):
-            for file in files:
-                if name_pattern in file and (file.endswith(".exe") or not "." in file):
-                    return Path(root) / file
-        return None
-
-    def setup_arm_gcc(self):
-        """Download and set up ARM GCC toolchain"""
-        system = self.get_system()
-        
-        if system not in self.download_urls["arm-gcc"]:
-            print(f"ARM GCC download not available for {system}")
-            return False
-            
-        # Create destination directory
-        arm_gcc_dir = self.tools_dir / "arm-gcc"
-        arm_gcc_dir.mkdir(exist_ok=True)
-        
-        # Download URL
-        url = self.download_urls["arm-gcc"][system]
-        filename = url.split("/")[-1]
-        download_path = self.tools_dir / filename
-        
-        # Download if needed
-        if not download_path.exists():
-            if not self.download_file(url, download_path):
-                return False
-        
-        # Extract archive
-        if not self.extract_archive(download_path, arm_gcc_dir):
-            return False
-            
-        # Find the gcc executable
-        gcc_exec = self.find_executable(arm_gcc_dir, "arm-none-eabi-gcc")
-        if not gcc_exec:
-            print("Could not find ARM GCC executable after extraction")
-            return False
-            
-        # Update config
-        if "toolchains" not in self.config:
-            self.config["toolchains"] = {}
-        if "arm-gcc" not in self.config["toolchains"]:
-            self.config["toolchains"]["arm-gcc"] = {}
-            
-        self.config["toolchains"]["arm-gcc"][system] = str(gcc_exec)
-        self.save_config()
-        
-        print(f"ARM GCC installed at: {gcc_exec}")
-        return True
+# Shared connection pool for all downloads
+_HTTP = urllib3.PoolManager(maxsize=4, retries=urllib3.Retry(3, backoff_factor=0.3)) if urllib3 else None
 
-    def setup_xtensa_gcc(self):
-        """Download and set up Xtensa GCC toolchain for ESP32"""
-        system = self.get_system()
-        
-        if system not in self.download_urls["xtensa-gcc"]:
-            print(f"Xtensa GCC download not available for {system}")
-            return False
-            
-        # Create destination directory
-        xtensa_gcc_dir = self.tools_dir / "xtensa-gcc"
-        xtensa_gcc_dir.mkdir(exist_ok=True)
-        
-        # Download URL
-        url = self.download_urls["xtensa-gcc"][system]
-        filename = url.split("/")[-1]
-        download_path = self.tools_dir / filename
-        
-        # Download if needed
-        if not download_path.exists():
-            if not self.download_file(url, download_path):
-                return False
-        
-        # Extract archive
-        if not self.extract_archive(download_path, xtensa_gcc_dir):
-            return False
-            
-        # Find the gcc executable
-        gcc_exec = self.find_executable(xtensa_gcc_dir, "xtensa-esp32-elf-gcc")
-        if not gcc_exec:
-            print("Could not find Xtensa GCC executable after extraction")
-            return False
-            
-        # Update config
-        if "toolchains" not in self.config:
-            self.config["toolchains"] = {}
-        if "xtensa-gcc" not in self.config["toolchains"]:
-            self.config["toolchains"]["xtensa-gcc"] = {}
-            
-        self.config["toolchains"]["xtensa-gcc"][system] = str(gcc_exec)
-        self.save_config()
-        
-        print(f"Xtensa GCC installed at: {gcc_exec}")
-        return True
+# Downloads are streamed to disk in chunks of this size
+_CHUNK_SIZE = 1 << 20
 
-    def generate_pico_sdk_files(self, pico_sdk_dir):
-        """Generate the necessary files for Pico SDK"""
-        print("Generating Pico SDK files...")
+# Buffer size for reading tar archives and copying their members during extraction
+_EXTRACT_BUFSIZE = 1 << 20
 
-        # Create build directory
-        build_dir = pico_sdk_dir / "build"
-        build_dir.mkdir(exist_ok=True)
+# An existing Pico SDK checkout is updated at most once per this many seconds
+_SDK_UPDATE_INTERVAL = 24 * 60 * 60
 
-        # Create generated directory
-        generated_dir = build_dir / "generated"
-        generated_dir.mkdir(exist_ok=True)
+# Multi-threaded decompressors tar can use instead of its own, in order of preference.
+# lbzip2 parallelizes any .bz2 file, pbzip2 only files it compressed itself.
+_PARALLEL_DECOMPRESSORS = {
+    ".tar.bz2": ("lbzip2", "pbzip2"),
+    ".tar.gz": ("pigz",),
+}
 
-        # Create pico_base directory
-        pico_base_dir = generated_dir / "pico_base"
-        pico_base_dir.mkdir(exist_ok=True)
 
-        # Create version.h file
-        version_h_path = pico_base_dir / "version.h"
-        with open(version_h_path, 'w') as f:
-            f.write("""
+# Compatibility headers written into the Pico SDK by generate_pico_sdk_files
+_PICO_VERSION_H = b"""
 /* Auto-generated file for Micro++ compatibility */
 #ifndef _PICO_VERSION_H
 #define _PICO_VERSION_H
@@ -250,12 +65,9 @@ class MicroPPSetup:
 #define PICO_SDK_VERSION_STRING   "1.5.0"
 
 #endif
-""")
+"""
 
-        # Create config.h file
-        config_h_path = pico_base_dir / "pico_config.h"
-        with open(config_h_path, 'w') as f:
-            f.write("""
+_PICO_CONFIG_H = b"""
 /* Auto-generated file for Micro++ compatibility */
 #ifndef _PICO_CONFIG_H
 #define _PICO_CONFIG_H
@@ -272,14 +84,9 @@ class MicroPPSetup:
 #define PICO_STDIO_DEFAULT_CRLF 1
 
 #endif
-""")
-
-        # Create platform.h file
-        platform_dir = pico_base_dir / "pico"
-        platform_dir.mkdir(exist_ok=True)
-        platform_h_path = platform_dir / "platform.h"
-        with open(platform_h_path, 'w') as f:
-            f.write("""
+"""
+
+_PICO_PLATFORM_H = b"""
 /* Auto-generated file for Micro++ compatibility */
 #ifndef _PICO_PLATFORM_H
 #define _PICO_PLATFORM_H
@@ -299,14 +106,9 @@ class MicroPPSetup:
 #endif
 
 #endif
-""")
-
-        # Create boards.h file
-        boards_dir = pico_sdk_dir / "src" / "boards" / "include" / "boards"
-        boards_dir.mkdir(exist_ok=True, parents=True)
-        pico_h_path = boards_dir / "pico.h"
-        with open(pico_h_path, 'w') as f:
-            f.write("""
+"""
+
+_BOARDS_PICO_H = b"""
 /* Auto-generated file for Micro++ compatibility */
 #ifndef _BOARDS_PICO_H
 #define _BOARDS_PICO_H
@@ -324,89 +126,24 @@ class MicroPPSetup:
 #define PICO_DEFAULT_SPI_CSN_PIN 17
 
 #endif
-""")
-
-        print(f"Created necessary Pico SDK files in {build_dir}")
-        return True
+"""
 
-    def setup_pico_sdk(self):
-        """Download and set up Raspberry Pi Pico SDK"""
-        system = self.get_system()
-        
-        # Create destination directory
-        pico_sdk_dir = self.sdks_dir / "pico-sdk"
-        
-        # Check if Git is available
-        try:
-            subprocess.run(["git", "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        except (subprocess.SubprocessError, FileNotFoundError):
-            print("Git is required to clone the Pico SDK. Please install Git and try again.")
-            return False
-            
-        # Clone the repository if needed
-        if not pico_sdk_dir.exists():
-            print("Cloning Pico SDK repository...")
-            try:
-                subprocess.run(
-                    ["git", "clone", "--recurse-submodules", self.download_urls["pico-sdk"]["git"], str(pico_sdk_dir)],
-                    check=True
-                )
-            except subprocess.SubprocessError as e:
-                print(f"Error cloning Pico SDK: {e}")
-                return False
-                
-        # Update the repository
-        print("Updating Pico SDK...")
-        try:
-            subprocess.run(["git", "pull"], cwd=pico_sdk_dir, check=True)
-        except subprocess.SubprocessError as e:
-            print(f"Error updating Pico SDK: {e}")
-            # Continue anyway, as we might have a working version
-            
-        # Initialize submodules
-        print("Initializing submodules...")
-        try:
-            subprocess.run(
-                ["git", "submodule", "update", "--init", "--recursive"],
-                cwd=pico_sdk_dir,
-                check=True
-            )
-        except subprocess.SubprocessError as e:
-            print(f"Error initializing submodules: {e}")
-            # Continue anyway, as not all submodules might be needed
-        
-        # Generate necessary files for the SDK
-        self.generate_pico_sdk_files(pico_sdk_dir)
-            
-        # Update config
-        if "sdks" not in self.config:
-            self.config["sdks"] = {}
-        if "pico-sdk" not in self.config["sdks"]:
-            self.config["sdks"]["pico-sdk"] = {}
-            
-        self.config["sdks"]["pico-sdk"][system] = str(pico_sdk_dir)
-        self.save_config()
-        
-        print(f"Pico SDK installed at: {pico_sdk_dir}")
-        return True
 
-    def setup_rp2040_board(self):
-        """Set up RP2040 board definition"""
-        rp2040_file = self.boards_dir / "RP2040.py"
-        
-        # Only create if it doesn't exist
-        if not rp2040_file.exists():
-            print("Creating RP2040 board definition...")
-            
-            with open(rp2040_file, 'w') as f:
-                f.write('''"""
+# Board definitions written by setup_rp2040_board and setup_esp32_board
+_RP2040_BOARD = b'''"""
 Board specification for RP2040 (Raspberry Pi Pico)
+
+Firmware is copied with micropp_rt.fast_copy, which clones the file instead of
+copying its data when both paths are on the same reflink-capable filesystem
+(BTRFS, XFS with reflink, OpenZFS 2.2+).
 """
 
 import subprocess
 import os
 from pathlib import Path
 
+from micropp_rt import fast_copy
+
 
 def get_spec():
     return {
@@ -490,8 +227,7 @@ def deploy_firmware(firmware_file, address):
         # Copy the UF2 to the drive
         target_path = Path(drive) / firmware_file.name
         try:
-            import shutil
-            shutil.copy(firmware_file, target_path)
+            fast_copy(firmware_file, target_path)
             print(f"Copied {firmware_file} to {target_path}")
             return True
         except Exception as e:
@@ -509,24 +245,10 @@ def deploy_firmware(firmware_file, address):
         except Exception as e:
             print(f"Error deploying firmware: {str(e)}")
             return False
-''')
-            
-            print("RP2040 board definition created")
-        else:
-            print("RP2040 board definition already exists")
-            
-        return True
+'''
 
-    def setup_esp32_board(self):
-        """Set up ESP32 board definition"""
-        esp32_file = self.boards_dir / "ESP32.py"
-        
-        # Only create if it doesn't exist
-        if not esp32_file.exists():
-            print("Creating ESP32 board definition...")
-            
-            with open(esp32_file, 'w') as f:
-                f.write('''"""
+
+_ESP32_BOARD = b'''"""
 Board specification for ESP32
 """
 
@@ -607,27 +329,768 @@ def deploy_firmware(firmware_file, address):
     except Exception as e:
         print(f"Error deploying firmware: {str(e)}")
         return False
-''')
-            
-            print("ESP32 board definition created")
+'''
+
+
+def _extract_tar(tar_ref, extract_dir):
+    """Extract every member of an open tar archive without owner name lookups"""
+    # Members are otherwise copied out in 16 KiB chunks, whatever the stream's bufsize is
+    tar_ref.copybufsize = _EXTRACT_BUFSIZE
+
+    # numeric_owner skips the pwd/grp lookup per member, and the "data" filter
+    # (Python 3.12, backported to 3.8.17+) also drops ownership and unsafe members
+    if hasattr(tarfile, "data_filter"):
+        tar_ref.extractall(extract_dir, numeric_owner=True, filter="data")
+    else:
+        tar_ref.extractall(extract_dir, numeric_owner=True)
+
+
+class StreamExtractor:
+    """Extracts a tar archive from chunks written to it while the archive is still downloading"""
+
+    def __init__(self, archive_path, extract_dir, decompressor=None, log=print):
+        self.archive_path = archive_path
+        self.extract_dir = extract_dir
+        self.decompressor = decompressor
+        self.log = log
+        self.pipe = None
+        self.process = None
+        self.thread = None
+        self.error = None
+
+    def start(self):
+        """Start extracting, with tar and an external decompressor if given, else with tarfile"""
+        self.log(f"Extracting {self.archive_path} while downloading...")
+        if self.decompressor:
+            self.process = subprocess.Popen(
+                ["tar", "-x", "--no-same-owner", "-f", "-", "-C", str(self.extract_dir),
+                 f"--use-compress-program={self.decompressor}"],
+                stdin=subprocess.PIPE
+            )
+            self.pipe = self.process.stdin
         else:
-            print("ESP32 board definition already exists")
-            
-        return True
+            read_fd, write_fd = os.pipe()
+            self.pipe = os.fdopen(write_fd, 'wb')
+            self.thread = threading.Thread(target=self.extract, args=(os.fdopen(read_fd, 'rb'),), daemon=True)
+            self.thread.start()
+
+    def extract(self, reader):
+        """Extract the archive from the read end of the pipe"""
+        with reader:
+            try:
+                with tarfile.open(fileobj=reader, mode="r|*", bufsize=_EXTRACT_BUFSIZE) as tar_ref:
+                    _extract_tar(tar_ref, self.extract_dir)
+            except Exception as e:
+                self.error = e
+
+            # Drain anything left so the downloading side never blocks on a full pipe
+            while reader.read(_CHUNK_SIZE):
+                pass
+
+    def write(self, chunk):
+        """Feed the next downloaded chunk to the extractor"""
+        if self.pipe is None:
+            self.start()
+        try:
+            self.pipe.write(chunk)
+        except BrokenPipeError:
+            pass  # tar exited early, finish() reports the failure
+
+    def finish(self):
+        """Wait for extraction to end, returning whether the whole archive was extracted"""
+        if self.pipe is None:
+            return False
 
-    def check_system_compatibility(self):
-        """Check if the current system is compatible"""
+        try:
+            self.pipe.close()
+        except BrokenPipeError:
+            pass
+
+        if self.process:
+            success = self.process.wait() == 0
+        else:
+            self.thread.join()
+            success = self.error is None
+            if self.error:
+                self.log(f"Error extracting archive: {self.error}")
+        return success
+
+
+class MicroPPSetup:
+    def __init__(self):
+        self.system = self._detect_system()
+        self.base_dir = Path(__file__).parent.absolute()
+        self.config_file = self.base_dir / "config.json"
+        self.boards_dir = self.base_dir / "boards"
+        self.tools_dir = self.base_dir / "tools"
+        self.sdks_dir = self.base_dir / "sdks"
+
+        # Shared by all checkouts, so a toolchain only has to be downloaded once per machine
+        self.toolchain_cache_dir = Path.home() / ".cache" / "micropp"
+        
+        # URLs for toolchain and SDK downloads - removed macOS URLs
+        self.download_urls = {
+            "arm-gcc": {
+                "windows": "https://developer.arm.com/-/media/Files/downloads/gnu-rm/10.3-2021.10/gcc-arm-none-eabi-10.3-2021.10-win32.zip",
+                "linux": "https://developer.arm.com/-/media/Files/downloads/gnu-rm/10.3-2021.10/gcc-arm-none-eabi-10.3-2021.10-x86_64-linux.tar.bz2"
+            },
+            "xtensa-gcc": {
+                "windows": "https://github.com/espressif/crosstool-NG/releases/download/esp-2021r2-patch5/xtensa-esp32-elf-gcc8_4_0-esp-2021r2-patch5-win32.zip",
+                "linux": "https://github.com/espressif/crosstool-NG/releases/download/esp-2021r2-patch5/xtensa-esp32-elf-gcc8_4_0-esp-2021r2-patch5-linux-amd64.tar.gz"
+            },
+            "pico-sdk": {
+                "git": "https://github.com/raspberrypi/pico-sdk.git"
+            }
+        }
+
+        # Create necessary directories
+        self.tools_dir.mkdir(exist_ok=True)
+        self.sdks_dir.mkdir(exist_ok=True)
+        self.boards_dir.mkdir(exist_ok=True)
+        
+        # Initialize config
+        self.config = self.load_config()
+
+        # Setup tasks run in parallel, so config updates and saves must be serialized.
+        # Reentrant because tasks already hold it around their update when they save.
+        self._config_lock = threading.RLock()
+
+        # Downloads also run in parallel and share the terminal for their progress output
+        self._progress_lock = threading.Lock()
+        self._active_downloads = 0
+        self._progress_bar_open = False
+
+    def load_config(self):
+        """Load or create the configuration file"""
+        if self.config_file.exists():
+            with open(self.config_file, 'r') as f:
+                return json.load(f)
+        else:
+            # Default config
+            return {
+                "toolchains": {},
+                "sdks": {}
+            }
+
+    def save_config(self):
+        """Save configuration to file"""
+        with self._config_lock:
+            data = json.dumps(self.config, indent=2).encode()
+
+            # Replace the old file only once the new one is fully written
+            temp_path = self.config_file.with_suffix(".json.tmp")
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, self.config_file)
+
+    def _detect_system(self):
+        """Detect the current operating system, exiting on unsupported ones"""
         system = platform.system().lower()
         if system == "darwin":
-            print("===========================================================")
-            print("ERROR: macOS detected!")
-            print("Unfortunately, this software doesn't currently support macOS.")
-            print("We recommend using Windows or Linux for the best experience.")
-            print("===========================================================")
             # Note: macOS users, we love you... but we don't have a Mac to test on.
             # Please switch to Windows or Linux for the best experience. 
             # Haha... sorry... 
-            sys.exit(1)
+            raise SystemExit(
+                "===========================================================\n"
+                "ERROR: macOS detected!\n"
+                "Unfortunately, this software doesn't currently support macOS.\n"
+                "We recommend using Windows or Linux for the best experience.\n"
+                "==========================================================="
+            )
+        elif system == "windows":
+            return "windows"
+        else:
+            return "linux"  # Default to Linux for others
+
+    def get_system(self):
+        """Get the current operating system"""
+        return self.system
+
+    def open_url(self, url):
+        """Open a streaming HTTP response, through the shared connection pool if available"""
+        if _HTTP is None:
+            return urllib.request.urlopen(url)
+
+        response = _HTTP.request("GET", url, preload_content=False)
+        if response.status != 200:
+            response.release_conn()
+            raise IOError(f"HTTP {response.status} for {url}")
+        return response
+
+    def download_file(self, url, dest_path, on_chunk=None):
+        """Download a file with progress indicator, passing each chunk to on_chunk if given"""
+        self.log(f"Downloading from {url}...")
+        
+        # Create temporary file for download next to its destination, so the final move is a rename
+        temp_file = tempfile.NamedTemporaryFile(delete=False, dir=Path(dest_path).parent, suffix=".part")
+        temp_path = temp_file.name
+        
+        try:
+            # Download with progress reporting, redrawn at most every 0.1s and only when the percentage changes,
+            # labeled since several downloads may run at once
+            name = Path(dest_path).name
+            last_percent = -1
+            last_step = -1
+            last_time = 0.0
+            parallel = False
+
+            def report_progress(downloaded, total_size):
+                nonlocal last_percent, last_step, last_time, parallel
+                if total_size <= 0:
+                    return
+                percent = min(int(downloaded * 100 / total_size), 100)
+                now = time.monotonic()
+                if percent == last_percent or (now - last_time < 0.1 and percent < 100):
+                    return
+                last_percent = percent
+                last_time = now
+
+                with self._progress_lock:
+                    # Live bars of parallel downloads would overwrite each other, so once another
+                    # download runs alongside this one, print a labeled line every 25% instead
+                    parallel = parallel or self._active_downloads > 1
+                    if parallel:
+                        if percent // 25 == last_step:
+                            return
+                        last_step = percent // 25
+                        text = f"{name}: {percent}%\n"
+                        if self._progress_bar_open:
+                            text = "\n" + text
+                        self._progress_bar_open = False
+                    else:
+                        text = f"\r{name} [{'#' * (percent // 5)}{'.' * (20 - percent // 5)}] {percent}%"
+                        self._progress_bar_open = True
+                    self.write_progress(text)
+
+            # Hash while streaming so the archive is never read back just to record its digest
+            sha256 = hashlib.sha256()
+            with temp_file:
+                response = self.open_url(url)
+                with self._progress_lock:
+                    self._active_downloads += 1
+                try:
+                    total_size = int(response.headers.get("Content-Length") or 0)
+                    self.prepare_download_file(temp_file.fileno(), total_size)
+                    downloaded = 0
+                    while True:
+                        chunk = response.read(_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        temp_file.write(chunk)
+                        sha256.update(chunk)
+                        if on_chunk:
+                            on_chunk(chunk)
+                        downloaded += len(chunk)
+                        report_progress(downloaded, total_size)
+                    # Drop any preallocated space the server did not fill
+                    temp_file.truncate(downloaded)
+                finally:
+                    # Pooled connections go back to the pool instead of being closed
+                    getattr(response, "release_conn", response.close)()
+                    self.finish_progress()
+
+            # Move to final destination, recording the digest so later runs can spot a damaged archive
+            shutil.move(temp_path, dest_path)
+            self.get_sha256_path(dest_path).write_text(sha256.hexdigest())
+            return True
+        except Exception as e:
+            self.log(f"Error downloading: {e}")
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            return False
+
+    def finish_progress(self):
+        """Mark a download as finished, ending its progress bar if one is shown"""
+        with self._progress_lock:
+            self._active_downloads -= 1
+            if self._progress_bar_open:
+                self.write_progress("\n")  # New line after progress bar
+                self._progress_bar_open = False
+
+    def log(self, message):
+        """Print a status line in a single write, so lines from parallel setup steps never interleave"""
+        with self._progress_lock:
+            text = f"{message}\n"
+            # Start on a fresh line if a progress bar is being drawn
+            if self._progress_bar_open:
+                text = "\n" + text
+                self._progress_bar_open = False
+            self.write_progress(text)
+
+    def write_progress(self, text):
+        """Write progress output straight to the terminal, without waiting for a newline"""
+        stdout = getattr(sys.stdout, "buffer", None)
+        if stdout is None:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        else:
+            sys.stdout.flush()  # Keep ordering with text already printed
+            stdout.write(text.encode())
+            stdout.flush()
+
+    def prepare_download_file(self, fd, size):
+        """Preallocate a download file and hint that it is written sequentially, where supported"""
+        try:
+            if size > 0 and hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(fd, 0, size)
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass  # Only hints, some filesystems do not support them
+
+    def get_sha256_path(self, archive_path):
+        """Get the path of the file recording an archive's SHA-256 digest"""
+        return Path(f"{archive_path}.sha256")
+
+    def hash_file(self, path):
+        """Compute the SHA-256 digest of a file"""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return hashlib.sha256().hexdigest()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return hashlib.sha256(data).hexdigest()
+
+    def ensure_download(self, url, download_path, on_chunk=None):
+        """Download url to download_path unless an intact copy is already there"""
+        if download_path.exists():
+            sha256_path = self.get_sha256_path(download_path)
+            expected = sha256_path.read_text().strip() if sha256_path.exists() else None
+
+            digest = self.hash_file(download_path)
+            # An archive from before digests were recorded has nothing to check it against
+            if not expected or digest == expected:
+                # Always record the digest, since the manifest is built from it
+                sha256_path.write_text(digest)
+                return True
+
+            self.log(f"{download_path.name} is damaged (SHA-256 mismatch), downloading it again")
+            download_path.unlink()
+
+        return self.download_file(url, download_path, on_chunk)
+
+    def download_and_extract(self, url, download_path, extract_dir):
+        """Download an archive if needed and extract it, extracting tar archives while they download"""
+        extractor = None
+        if str(download_path).endswith('.tar.gz') or str(download_path).endswith('.tar.bz2'):
+            extractor = StreamExtractor(
+                download_path, extract_dir, self.find_parallel_decompressor(download_path), self.log
+            )
+
+        downloaded = self.ensure_download(url, download_path, extractor.write if extractor else None)
+        streamed = extractor.finish() if extractor else False
+        if not downloaded:
+            return False
+        if streamed:
+            return True
+
+        # The archive was already on disk, or extracting it during the download failed
+        return self.extract_archive(download_path, extract_dir)
+
+    def extract_archive(self, archive_path, extract_dir):
+        """Extract a zip or tar archive"""
+        self.log(f"Extracting {archive_path}...")
+        
+        try:
+            if str(archive_path).endswith('.zip'):
+                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
+                    zip_ref.extractall(extract_dir)
+            elif str(archive_path).endswith('.tar.gz') or str(archive_path).endswith('.tar.bz2'):
+                decompressor = self.find_parallel_decompressor(archive_path)
+                if decompressor:
+                    result = subprocess.run(
+                        ["tar", "-x", "--no-same-owner", "-f", str(archive_path), "-C", str(extract_dir),
+                         f"--use-compress-program={decompressor}"]
+                    )
+                    if result.returncode == 0:
+                        return True
+                    self.log(f"{decompressor} extraction failed, falling back to built-in extraction")
+
+                # Stream mode decompresses the archive in a single sequential pass
+                with tarfile.open(archive_path, mode="r|*", bufsize=_EXTRACT_BUFSIZE) as tar_ref:
+                    _extract_tar(tar_ref, extract_dir)
+            else:
+                self.log(f"Unsupported archive format: {archive_path}")
+                return False
+                
+            return True
+        except Exception as e:
+            self.log(f"Error extracting archive: {e}")
+            return False
+
+    def get_manifest_path(self, tool_dir):
+        """Get the path of the manifest recording which archive a tool directory was extracted from"""
+        return tool_dir / ".manifest.json"
+
+    def count_extracted_files(self, tool_dir):
+        """Count the entries of a tool directory, not counting its manifest"""
+        manifest_name = self.get_manifest_path(tool_dir).name
+        return sum(1 for path in tool_dir.rglob("*") if path.name != manifest_name)
+
+    def is_extracted(self, tool_dir, download_path, toolchain_name):
+        """Check whether download_path was already fully extracted and its compiler is still configured"""
+        gcc_exec = self.config.get("toolchains", {}).get(toolchain_name, {}).get(self.get_system())
+        if not gcc_exec or not Path(gcc_exec).is_file():
+            return False
+
+        try:
+            with open(self.get_manifest_path(tool_dir), 'r') as f:
+                manifest = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return False
+        if manifest.get("archive") != download_path.name:
+            return False
+
+        # A toolchain restored from the cache has no archive on disk to compare against
+        sha256_path = self.get_sha256_path(download_path)
+        if sha256_path.exists() and sha256_path.read_text().strip() != manifest.get("sha256"):
+            return False
+
+        # Files added or removed since extraction mean the tree can't be trusted
+        return manifest.get("files") == self.count_extracted_files(tool_dir)
+
+    def mark_extracted(self, tool_dir, download_path, url):
+        """Record that download_path was fully extracted into tool_dir"""
+        manifest = {
+            "archive": download_path.name,
+            "url": url,
+            "sha256": self.get_sha256_path(download_path).read_text().strip(),
+            "files": self.count_extracted_files(tool_dir),
+        }
+
+        # Written to a temporary file first, so an interrupted setup never leaves a partial manifest
+        manifest_path = self.get_manifest_path(tool_dir)
+        temp_path = manifest_path.with_name(f"{manifest_path.name}.tmp")
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, manifest_path)
+
+    def get_toolchain_cache_path(self, url):
+        """Get the path of the cached copy of the toolchain downloaded from url"""
+        return self.toolchain_cache_dir / f"{hashlib.sha256(url.encode()).hexdigest()}.tar.zst"
+
+    def restore_toolchain(self, url, tool_dir):
+        """Extract a previously cached copy of a toolchain, returning whether one was restored"""
+        cache_path = self.get_toolchain_cache_path(url)
+        if zstandard is None or not cache_path.exists():
+            return False
+
+        self.log(f"Restoring toolchain from {cache_path}...")
+        try:
+            with open(cache_path, 'rb') as cache_file, \
+                    zstandard.ZstdDecompressor().stream_reader(cache_file) as reader, \
+                    tarfile.open(fileobj=reader, mode="r|") as tar_ref:
+                _extract_tar(tar_ref, tool_dir)
+            return True
+        except Exception as e:
+            self.log(f"Error restoring toolchain from cache: {e}")
+            # Leave an empty directory, so the archive is never extracted over a partial tree
+            shutil.rmtree(tool_dir, ignore_errors=True)
+            tool_dir.mkdir()
+            # Drop the damaged copy so this install caches a good one
+            cache_path.unlink(missing_ok=True)
+            return False
+
+    def cache_toolchain(self, url, tool_dir):
+        """Pack an extracted toolchain into the cache so later setups can skip downloading it"""
+        cache_path = self.get_toolchain_cache_path(url)
+        if zstandard is None or cache_path.exists():
+            return
+
+        self.log(f"Caching toolchain in {cache_path}...")
+        self.toolchain_cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, 'wb') as cache_file:
+                # With a checksum, a cache file corrupted on disk fails to restore instead of restoring bad binaries
+                compressor = zstandard.ZstdCompressor(threads=-1, write_checksum=True)
+                with compressor.stream_writer(cache_file, closefd=False) as writer, \
+                        tarfile.open(fileobj=writer, mode="w|") as tar_ref:
+                    tar_ref.add(tool_dir, arcname=".")
+            os.replace(temp_path, cache_path)
+        except Exception as e:
+            self.log(f"Error caching toolchain: {e}")
+            temp_path.unlink(missing_ok=True)
+
+    def install_toolchain(self, url, download_path, tool_dir, exe_name):
+        """Install a toolchain into tool_dir, returning its compiler, or None leaving tool_dir untouched"""
+        # Build the new tree next to the old one, so a failed install never touches a working toolchain
+        staging_dir = tool_dir.with_name(f".{tool_dir.name}.tmp")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        staging_dir.mkdir()
+
+        # Whatever happens, the staging directory is gone afterwards, it was swapped in or is removed
+        try:
+            restored = self.restore_toolchain(url, staging_dir)
+            if not restored and not self.download_and_extract(url, download_path, staging_dir):
+                return None
+
+            gcc_exec = self.find_executable(staging_dir, exe_name)
+            if not gcc_exec:
+                self.log(f"Could not find {exe_name} after extraction")
+                return None
+
+            # A restored toolchain brings its manifest along
+            if not restored:
+                self.mark_extracted(staging_dir, download_path, url)
+
+            # Swap the new tree in, moving the old one aside first since a directory can't replace a non-empty one
+            old_dir = tool_dir.with_name(f".{tool_dir.name}.old")
+            shutil.rmtree(old_dir, ignore_errors=True)
+            try:
+                if tool_dir.exists():
+                    os.replace(tool_dir, old_dir)
+                os.replace(staging_dir, tool_dir)
+            except OSError as e:
+                self.log(f"Error installing {tool_dir}: {e}")
+                if old_dir.exists() and not tool_dir.exists():
+                    os.replace(old_dir, tool_dir)
+                return None
+            shutil.rmtree(old_dir, ignore_errors=True)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+        if not restored:
+            self.cache_toolchain(url, tool_dir)
+        return tool_dir / gcc_exec.relative_to(staging_dir)
+
+    def find_parallel_decompressor(self, archive_path):
+        """Find an installed multi-threaded decompressor for a tar archive"""
+        if self.get_system() != "linux" or not shutil.which("tar"):
+            return None
+
+        for suffix, tools in _PARALLEL_DECOMPRESSORS.items():
+            if str(archive_path).endswith(suffix):
+                for tool in tools:
+                    path = shutil.which(tool)
+                    if path:
+                        return path
+        return None
+
+    def find_executable(self, base_dir, name_pattern):
+        """Find an executable in a directory tree"""
+        # Toolchain archives have a single top-level directory with the executables in bin/
+        exe_name = name_pattern + (".exe" if self.get_system() == "windows" else "")
+        for candidate in Path(base_dir).glob(f"*/bin/{exe_name}"):
+            if candidate.is_file():
+                return candidate
+
+        # Fall back to searching the whole tree for unexpected layouts. scandir answers
+        # is_dir/is_file from the directory listing, without a stat per entry.
+        names = {name_pattern, exe_name}
+
+        def iter_matches(root):
+            try:
+                with os.scandir(root) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            yield from iter_matches(entry.path)
+                        elif entry.name in names and entry.is_file():
+                            yield Path(entry.path)
+            except OSError:
+                pass  # Unreadable directory, keep searching the rest
+
+        return next(iter_matches(base_dir), None)
+
+    def setup_arm_gcc(self):
+        """Download and set up ARM GCC toolchain"""
+        system = self.get_system()
+        
+        if system not in self.download_urls["arm-gcc"]:
+            self.log(f"ARM GCC download not available for {system}")
+            return False
+            
+        # Destination directory, created when the toolchain is installed
+        arm_gcc_dir = self.tools_dir / "arm-gcc"
+        
+        # Download URL
+        url = self.download_urls["arm-gcc"][system]
+        filename = url.split("/")[-1]
+        download_path = self.tools_dir / filename
+
+        # Nothing to do if this archive was already extracted
+        if self.is_extracted(arm_gcc_dir, download_path, "arm-gcc"):
+            self.log(f"ARM GCC already installed at: {self.config['toolchains']['arm-gcc'][system]}")
+            return True
+        
+        # Restore from the toolchain cache, or download if needed and extract archive
+        gcc_exec = self.install_toolchain(url, download_path, arm_gcc_dir, "arm-none-eabi-gcc")
+        if not gcc_exec:
+            self.log("Could not install ARM GCC, keeping the existing installation")
+            return False
+            
+        # Update config
+        with self._config_lock:
+            if "toolchains" not in self.config:
+                self.config["toolchains"] = {}
+            if "arm-gcc" not in self.config["toolchains"]:
+                self.config["toolchains"]["arm-gcc"] = {}
+
+            self.config["toolchains"]["arm-gcc"][system] = str(gcc_exec)
+            self.save_config()
+        
+        self.log(f"ARM GCC installed at: {gcc_exec}")
+        return True
+
+    def setup_xtensa_gcc(self):
+        """Download and set up Xtensa GCC toolchain for ESP32"""
+        system = self.get_system()
+        
+        if system not in self.download_urls["xtensa-gcc"]:
+            self.log(f"Xtensa GCC download not available for {system}")
+            return False
+            
+        # Destination directory, created when the toolchain is installed
+        xtensa_gcc_dir = self.tools_dir / "xtensa-gcc"
+        
+        # Download URL
+        url = self.download_urls["xtensa-gcc"][system]
+        filename = url.split("/")[-1]
+        download_path = self.tools_dir / filename
+
+        # Nothing to do if this archive was already extracted
+        if self.is_extracted(xtensa_gcc_dir, download_path, "xtensa-gcc"):
+            self.log(f"Xtensa GCC already installed at: {self.config['toolchains']['xtensa-gcc'][system]}")
+            return True
+        
+        # Restore from the toolchain cache, or download if needed and extract archive
+        gcc_exec = self.install_toolchain(url, download_path, xtensa_gcc_dir, "xtensa-esp32-elf-gcc")
+        if not gcc_exec:
+            self.log("Could not install Xtensa GCC, keeping the existing installation")
+            return False
+            
+        # Update config
+        with self._config_lock:
+            if "toolchains" not in self.config:
+                self.config["toolchains"] = {}
+            if "xtensa-gcc" not in self.config["toolchains"]:
+                self.config["toolchains"]["xtensa-gcc"] = {}
+
+            self.config["toolchains"]["xtensa-gcc"][system] = str(gcc_exec)
+            self.save_config()
+        
+        self.log(f"Xtensa GCC installed at: {gcc_exec}")
+        return True
+
+    def generate_pico_sdk_files(self, pico_sdk_dir):
+        """Generate the necessary files for Pico SDK"""
+        self.log("Generating Pico SDK files...")
+
+        build_dir = pico_sdk_dir / "build"
+        pico_base_dir = build_dir / "generated" / "pico_base"
+        files = [
+            (pico_base_dir / "version.h", _PICO_VERSION_H),
+            (pico_base_dir / "pico_config.h", _PICO_CONFIG_H),
+            (pico_base_dir / "pico" / "platform.h", _PICO_PLATFORM_H),
+            (pico_sdk_dir / "src" / "boards" / "include" / "boards" / "pico.h", _BOARDS_PICO_H),
+        ]
+
+        # Create each directory once, then write each file with a single call unless it's up to date
+        for directory in {path.parent for path, _ in files}:
+            directory.mkdir(parents=True, exist_ok=True)
+        for path, data in files:
+            if path.exists() and path.read_bytes() == data:
+                continue
+            path.write_bytes(data)
+
+        self.log(f"Created necessary Pico SDK files in {build_dir}")
+        return True
+
+    def setup_pico_sdk(self):
+        """Download and set up Raspberry Pi Pico SDK"""
+        system = self.get_system()
+        
+        # Create destination directory
+        pico_sdk_dir = self.sdks_dir / "pico-sdk"
+        
+        # Check if Git is available
+        try:
+            subprocess.run(["git", "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        except (subprocess.SubprocessError, FileNotFoundError):
+            self.log("Git is required to clone the Pico SDK. Please install Git and try again.")
+            return False
+            
+        # Clone the repository if needed, without history since only the latest files are used
+        if not pico_sdk_dir.exists():
+            self.log("Cloning Pico SDK repository...")
+            try:
+                subprocess.run(
+                    ["git", "clone", "--depth", "1", "--recurse-submodules", "--shallow-submodules",
+                     self.download_urls["pico-sdk"]["git"], str(pico_sdk_dir)],
+                    check=True
+                )
+            except subprocess.SubprocessError as e:
+                self.log(f"Error cloning Pico SDK: {e}")
+                return False
+
+        # Update the repository if it hasn't been fetched recently
+        git_dir = pico_sdk_dir / ".git"
+        last_fetch = git_dir / "FETCH_HEAD" if (git_dir / "FETCH_HEAD").exists() else git_dir / "HEAD"
+        try:
+            needs_update = time.time() - last_fetch.stat().st_mtime > _SDK_UPDATE_INTERVAL
+        except OSError:
+            # Not a git checkout, so there is nothing to update
+            self.log(f"{pico_sdk_dir} is not a git checkout, skipping update")
+            needs_update = False
+        if needs_update:
+            self.log("Updating Pico SDK...")
+            try:
+                subprocess.run(["git", "fetch", "--depth", "1", "origin", "HEAD"], cwd=pico_sdk_dir, check=True)
+                subprocess.run(["git", "reset", "--hard", "FETCH_HEAD"], cwd=pico_sdk_dir, check=True)
+                subprocess.run(
+                    ["git", "submodule", "update", "--init", "--recursive", "--depth", "1"],
+                    cwd=pico_sdk_dir,
+                    check=True
+                )
+            except subprocess.SubprocessError as e:
+                self.log(f"Error updating Pico SDK: {e}")
+                # Continue anyway, as we might have a working version
+        
+        # Generate necessary files for the SDK
+        self.generate_pico_sdk_files(pico_sdk_dir)
+            
+        # Update config
+        with self._config_lock:
+            if "sdks" not in self.config:
+                self.config["sdks"] = {}
+            if "pico-sdk" not in self.config["sdks"]:
+                self.config["sdks"]["pico-sdk"] = {}
+
+            self.config["sdks"]["pico-sdk"][system] = str(pico_sdk_dir)
+            self.save_config()
+        
+        self.log(f"Pico SDK installed at: {pico_sdk_dir}")
+        return True
+
+    def setup_rp2040_board(self):
+        """Set up RP2040 board definition"""
+        rp2040_file = self.boards_dir / "RP2040.py"
+        
+        # Only create if it doesn't exist
+        if not rp2040_file.exists():
+            self.log("Creating RP2040 board definition...")
+            
+            rp2040_file.write_bytes(_RP2040_BOARD)
+            
+            self.log("RP2040 board definition created")
+        else:
+            self.log("RP2040 board definition already exists")
+            
+        return True
+
+    def setup_esp32_board(self):
+        """Set up ESP32 board definition"""
+        esp32_file = self.boards_dir / "ESP32.py"
+        
+        # Only create if it doesn't exist
+        if not esp32_file.exists():
+            self.log("Creating ESP32 board definition...")
+            
+            esp32_file.write_bytes(_ESP32_BOARD)
+            
+            self.log("ESP32 board definition created")
+        else:
+            self.log("ESP32 board definition already exists")
+            
         return True
 
     def run(self):
@@ -637,28 +1100,25 @@ def deploy_firmware(firmware_file, address):
         print("NOTICE: This software is intentionally incompatible with macOS.")
         print()
         
-        # Check system compatibility first
-        self.check_system_compatibility()
-        
-        # Setup ARM GCC
-        print("Setting up ARM GCC toolchain...")
-        self.setup_arm_gcc()
-        print()
-        
-        # Setup Xtensa GCC
-        print("Setting up Xtensa GCC toolchain for ESP32...")
-        self.setup_xtensa_gcc()
-        print()
-        
-        # Setup Pico SDK
-        print("Setting up Raspberry Pi Pico SDK...")
-        self.setup_pico_sdk()
-        print()
-        
-        # Setup board definitions
-        print("Setting up board definitions...")
-        self.setup_rp2040_board()
-        self.setup_esp32_board()
+        # Each step is mostly waiting on its own download or clone, so run them all at once
+        tasks = {
+            "ARM GCC toolchain": self.setup_arm_gcc,
+            "Xtensa GCC toolchain for ESP32": self.setup_xtensa_gcc,
+            "Raspberry Pi Pico SDK": self.setup_pico_sdk,
+            "RP2040 board definition": self.setup_rp2040_board,
+            "ESP32 board definition": self.setup_esp32_board,
+        }
+        print("Setting up toolchains, SDKs and board definitions...")
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {executor.submit(task): name for name, task in tasks.items()}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    success = future.result()
+                except Exception as e:
+                    self.log(f"Error setting up {name}: {e}")
+                    continue
+                self.log(f"{name}: {'done' if success else 'failed'}")
         print()
         
         print("===== Setup Complete =====")
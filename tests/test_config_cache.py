@@ -0,0 +1,77 @@
+"""
+Tests for the parsed config cache in micro++.py
+"""
+
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+
+class ConfigCacheTest(unittest.TestCase):
+    def setUp(self):
+        # micro++.py keeps its config next to itself, so load a copy from a temp dir
+        self.work_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.work_dir)
+        for name in ("micro++.py", "micropp_rt.py"):
+            shutil.copy(REPO_DIR / name, self.work_dir)
+        sys.path.insert(0, str(self.work_dir))
+        self.addCleanup(sys.path.remove, str(self.work_dir))
+
+        spec = importlib.util.spec_from_file_location("micropp", self.work_dir / "micro++.py")
+        self.micropp = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.micropp)
+
+        self.config_file = self.work_dir / "config.json"
+        self.config = {"toolchains": {"arm-gcc": {"linux": "/opt/arm/bin/arm-none-eabi-gcc"}}, "sdks": {}}
+        self.config_file.write_text(json.dumps(self.config))
+
+    def load(self):
+        """Build a MicroPP, counting how often the config file is parsed"""
+        with mock.patch.object(self.micropp, "_loads", wraps=self.micropp._loads) as loads:
+            micro_pp = self.micropp.MicroPP()
+        return micro_pp, loads.call_count
+
+    def test_second_load_skips_parse(self):
+        first, parses = self.load()
+        self.assertEqual(parses, 1)
+        self.assertIn(self.config_file, self.micropp._CONFIG_CACHE)
+
+        second, parses = self.load()
+        self.assertEqual(parses, 0)
+        self.assertEqual(second.config, self.config)
+
+        # Each instance gets its own copy, so changes don't leak into the cache
+        second.config["sdks"]["pico-sdk"] = {}
+        self.assertEqual(self.micropp._CONFIG_CACHE[self.config_file][2], self.config)
+
+    def test_changed_mtime_invalidates(self):
+        self.load()
+        st = os.stat(self.config_file)
+        os.utime(self.config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+        _, parses = self.load()
+        self.assertEqual(parses, 1)
+
+    def test_changed_size_invalidates(self):
+        self.load()
+        st = os.stat(self.config_file)
+        self.config["sdks"]["pico-sdk"] = {"linux": "/opt/pico-sdk"}
+        self.config_file.write_text(json.dumps(self.config))
+        # Keep the old mtime, so only the size tells the files apart
+        os.utime(self.config_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+        micro_pp, parses = self.load()
+        self.assertEqual(parses, 1)
+        self.assertEqual(micro_pp.config, self.config)
+
+
+if __name__ == "__main__":
+    unittest.main()